@@ -86,7 +86,8 @@ class AudioGenerator:
         scene_number: Optional[int] = None,
         filename: Optional[str] = None,
         stability: Optional[float] = None,
-        similarity_boost: Optional[float] = None
+        similarity_boost: Optional[float] = None,
+        timestamp: Optional[str] = None
     ) -> Path:
         """
         テキストから音声ファイルを生成して保存
@@ -97,6 +98,7 @@ class AudioGenerator:
             filename: ファイル名（Noneの場合は自動生成）
             stability: 安定性（0.0-1.0）
             similarity_boost: 類似度ブースト（0.0-1.0）
+            timestamp: ファイル名に使うタイムスタンプ（Noneの場合は現在時刻）
         
         Returns:
             Path: 保存された音声ファイルのパス
@@ -114,7 +116,8 @@ class AudioGenerator:
             filename = file_manager.generate_filename(
                 prefix="audio",
                 extension=AUDIO_FORMAT,
-                scene_number=scene_number
+                scene_number=scene_number,
+                timestamp=timestamp
             )
         
         # ファイルパスを取得
@@ -153,6 +156,8 @@ class AudioGenerator:
         
         audio_files = {}
         scenes = script_data.get("scenes", [])
+        # 全シーンのファイル名で同じタイムスタンプを使う
+        timestamp = file_manager.batch_timestamp()
         
         for scene in scenes:
             scene_number = scene.get("scene_number")
@@ -172,7 +177,8 @@ class AudioGenerator:
                     text=text_for_tts,
                     scene_number=scene_number,
                     stability=stability,
-                    similarity_boost=similarity_boost
+                    similarity_boost=similarity_boost,
+                    timestamp=timestamp
                 )
                 audio_files[str(scene_number)] = filepath
                 logger.info(f"シーン{scene_number}の音声生成が完了しました（{'dialogue_for_tts使用' if dialogue_for_tts else 'dialogue使用'}）")
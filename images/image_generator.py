@@ -222,7 +222,8 @@ class ImageGenerator:
         resize_to_video_size: bool = True,
         style_description: Optional[str] = None,
         instruction: Optional[str] = None,
-        is_long: bool = False
+        is_long: bool = False,
+        timestamp: Optional[str] = None
     ) -> Path:
         """
         プロンプトから画像ファイルを生成して保存
@@ -235,6 +236,7 @@ class ImageGenerator:
             style_description: 参考画像から抽出したスタイル説明（オプション）
             instruction: 追加の画像生成指示（オプション）
             is_long: Trueの場合は長尺用（16:9, 1920x1080）で生成・保存
+            timestamp: ファイル名に使うタイムスタンプ（Noneの場合は現在時刻）
         
         Returns:
             Path: 保存された画像ファイルのパス
@@ -256,7 +258,8 @@ class ImageGenerator:
             filename = file_manager.generate_filename(
                 prefix="image",
                 extension=IMAGE_FORMAT,
-                scene_number=scene_number
+                scene_number=scene_number,
+                timestamp=timestamp
             )
 
         # ファイルパスを取得（長尺時は output/images_long/）
@@ -329,6 +332,8 @@ class ImageGenerator:
         
         image_files = {}
         scenes = script_data.get("scenes", [])
+        # 全シーンのファイル名で同じタイムスタンプを使う
+        timestamp = file_manager.batch_timestamp()
         
         for scene in scenes:
             scene_number = scene.get("scene_number")
@@ -345,7 +350,8 @@ class ImageGenerator:
                     resize_to_video_size=resize_to_video_size,
                     style_description=style_description,
                     instruction=instruction,
-                    is_long=is_long
+                    is_long=is_long,
+                    timestamp=timestamp
                 )
                 image_files[str(scene_number)] = filepath
                 logger.info(f"シーン{scene_number}の画像生成が完了しました")
@@ -2,33 +2,292 @@
 動画編集ページ
 """
 import streamlit as st
+import base64
+import io
 import json
+import os
 import random
+import re
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
 
 import extra_streamlit_components as stx
+from PIL import Image
+
+# orjson があればクッキー用の設定のシリアライズに使用（なければ標準の json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-from video.video_editor import VideoEditor
 from utils.file_manager import file_manager
 from utils.logger import get_logger
 from config.constants import VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_WIDTH_LONG, VIDEO_HEIGHT_LONG
 
+if TYPE_CHECKING:
+    from video.video_editor import VideoEditor
+
 logger = get_logger(__name__)
 
+# シーン素材として扱う拡張子（大文字・小文字は区別しない）
+_IMAGE_EXTS = ("png", "jpg", "jpeg")
+_AUDIO_EXTS = ("mp3", "wav")
 
-def _image_path_to_bytes(image_path):  # Path | str -> bytes | None
-    """画像パスをバイト列で読み込む。表示の安定化のため。存在しない・読めない場合は None"""
-    if image_path is None:
+# シーン素材ファイル名（例: image_scene001_20240101_120000.png）からシーン番号を取り出す
+_IMAGE_SCENE_RE = re.compile(rf"image_scene(\d{{3,}})_.*\.(?:{'|'.join(_IMAGE_EXTS)})$", re.IGNORECASE)
+_AUDIO_SCENE_RE = re.compile(rf"audio_scene(\d{{3,}})_.*\.(?:{'|'.join(_AUDIO_EXTS)})$", re.IGNORECASE)
+_SCENE_FILE_RES = {"image": _IMAGE_SCENE_RE, "audio": _AUDIO_SCENE_RE}
+
+# VideoEditor は全セッションで共有するため、生成処理（幅・高さを書き換える）は同時に1つだけ実行する
+_video_editor_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_video_editor() -> "VideoEditor":
+    """動画エディタを取得（プロセス内で1つだけ作成して全セッションで共有）"""
+    # moviepy の読み込みは重いため、動画エディタを初めて使うときまで遅らせる
+    from video.video_editor import VideoEditor
+
+    try:
+        return VideoEditor()
+    except Exception as e:
+        logger.error(f"動画エディタの初期化に失敗しました: {e}")
+        raise
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _script_options(mtime_ns: int) -> Dict[str, str]:
+    """{台本ファイル名: パス文字列} の辞書（scripts ディレクトリの更新時刻をキーにキャッシュ）"""
+    return {f.name: str(f) for f in file_manager.list_scripts()}
+
+
+@st.cache_data(show_spinner=False)
+def _load_script_cached(path_str: str, mtime_ns: int) -> dict:
+    """台本を読み込む（パスと更新時刻をキーにキャッシュ。ファイルが更新されると再読み込み）"""
+    return file_manager.load_script(Path(path_str))
+
+
+@st.cache_data(show_spinner=False)
+def _load_image_mapping_cached(script_name: str, is_long: bool, mtime_ns: Optional[int]) -> Optional[dict]:
+    """画像マッピングを読み込む（マッピングファイルの更新時刻をキーにキャッシュ）"""
+    return file_manager.load_image_mapping(script_name, is_long=is_long)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_list_video_files(mtime_ns: int) -> list[tuple[Path, os.stat_result]]:
+    """動画ファイル一覧を stat 結果付きで取得（videos ディレクトリの更新時刻をキーにキャッシュ）"""
+    return file_manager.list_video_files_with_stat()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_list_bgvideos(mtime_ns: int) -> list[Path]:
+    """背景動画一覧（ショート用 bgvideos ディレクトリの更新時刻をキーにキャッシュ）"""
+    return file_manager.list_bgvideos()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_list_bgvideos_long(mtime_ns: int) -> list[Path]:
+    """背景動画一覧（長尺用 bgvideos_long ディレクトリの更新時刻をキーにキャッシュ）"""
+    return file_manager.list_bgvideos_long()
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _index_scene_assets(dir_path: str, dir_mtime_ns: int, kind: str) -> Dict[int, Path]:
+    """
+    ディレクトリを1回だけ走査し、{シーン番号: 最新のファイルパス} の辞書を作成
+    （ディレクトリの更新時刻をキーにキャッシュ）
+
+    Args:
+        dir_path: 走査するディレクトリ
+        dir_mtime_ns: ディレクトリの更新時刻（キャッシュキー）
+        kind: 素材の種類（"image" または "audio"）
+
+    Returns:
+        Dict[int, Path]: シーン番号ごとの最新ファイル（複数ある場合は更新日時が最新のもの）
+    """
+    pattern = _SCENE_FILE_RES[kind]
+    directory = Path(dir_path)
+    latest: Dict[int, tuple] = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                m = pattern.match(entry.name)
+                if not m or not entry.is_file():
+                    continue
+                scene_number = int(m.group(1))
+                mtime = entry.stat().st_mtime
+                if scene_number not in latest or mtime > latest[scene_number][0]:
+                    latest[scene_number] = (mtime, entry.name)
+    except FileNotFoundError:
+        return {}
+    return {n: directory / name for n, (_, name) in latest.items()}
+
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def _thumbnail_b64(path_str: str, mtime_ns: int, width: int = 162) -> Optional[str]:
+    """
+    プレビュー用の縮小画像をJPEGのbase64文字列で作成（パスと更新時刻をキーにキャッシュ）
+    
+    Returns:
+        str: base64文字列。読めない場合は None
+    """
+    try:
+        with Image.open(path_str) as img:
+            img.thumbnail((width, width * 2))
+            buf = io.BytesIO()
+            img.convert("RGB").save(buf, "JPEG", quality=70)
+        return base64.b64encode(buf.getvalue()).decode("ascii")
+    except Exception as e:
+        logger.debug(f"サムネイル作成エラー: {path_str} - {e}")
         return None
-    path = Path(image_path) if not isinstance(image_path, Path) else image_path
-    path = path.resolve()
-    if not path.exists():
+
+
+def _image_thumbnail(image_path):  # Path | str -> str | None
+    """画像パスから表示用サムネイル（base64）を取得。存在しない・読めない場合は None"""
+    if image_path is None:
         return None
+    path = Path(image_path).resolve()
     try:
-        return path.read_bytes()
-    except Exception:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
         return None
+    return _thumbnail_b64(str(path), mtime_ns)
+
+
+@st.cache_data(max_entries=20, ttl=3600, show_spinner=False)
+def _load_video_bytes(path_str: str, mtime_ns: int, size: int) -> bytes:
+    """動画ファイルをバイト列で読み込む（パス・更新時刻・サイズをキーにキャッシュ）"""
+    return Path(path_str).read_bytes()
+
+
+def _video_download_button(video_path: Path, stat: os.stat_result, key: str, label: str, prepare_label: str, **kwargs):
+    """
+    動画のダウンロードボタンを表示（ファイル本体は準備ボタンが押された動画だけ読み込む）
+    
+    Args:
+        video_path: 動画ファイルのパス
+        stat: 動画ファイルの stat 結果（キャッシュキーに使用）
+        key: ダウンロードボタンのキー
+        label: ダウンロードボタンのラベル
+        prepare_label: 準備ボタンのラベル
+        **kwargs: st.button / st.download_button に渡す追加引数
+    """
+    if st.session_state.get("video_download_target") == key:
+        st.download_button(
+            label=label,
+            data=_load_video_bytes(str(video_path), stat.st_mtime_ns, stat.st_size),
+            file_name=video_path.name,
+            mime="video/mp4",
+            key=key,
+            **kwargs
+        )
+    elif st.button(prepare_label, key=f"prepare_{key}", help="ダウンロードを準備します", **kwargs):
+        st.session_state.video_download_target = key
+        st.rerun()
+
+
+def _render_video(video_path: Path):
+    """動画のプレビューとダウンロードボタンを表示"""
+    stat = video_path.stat()
+    # 動画情報を表示
+    file_size = stat.st_size / (1024 * 1024)  # MB
+    st.caption(f"ファイル名: {video_path.name} | サイズ: {file_size:.2f} MB")
+    
+    # 動画を表示（ファイルパスを直接渡し、バイト列は読み込まない）
+    try:
+        st.video(str(video_path), format="video/mp4")
+    except Exception as e:
+        logger.error(f"動画表示エラー: {e}")
+        st.error(f"動画の表示に失敗しました: {e}")
+    
+    # ダウンロードボタン（押されるまでファイルを読み込まない）
+    try:
+        _video_download_button(
+            video_path,
+            stat,
+            key=f"dl_{video_path.name}",
+            label="⬇️ 動画をダウンロード",
+            prepare_label="📥 ダウンロードを準備",
+            use_container_width=True
+        )
+    except Exception as e:
+        logger.error(f"動画ダウンロードボタンの作成エラー: {e}")
+        st.error(f"ダウンロードボタンの作成に失敗しました: {e}")
+
+
+# st.fragment（旧: st.experimental_fragment）がないStreamlitでは通常の関数として実行する
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+@_fragment
+def _render_animation_grid(scenes: list, image_files: Dict[str, Path], animation_type_options: Dict[str, Optional[str]]):
+    """
+    各シーンのアニメーション設定欄を表示
+    フラグメントとして実行し、セレクトボックスの変更ではこの部分だけを再実行する
+    （選択結果は st.session_state.video_animation_types に保存）
+    """
+    # セレクトボックスの選択肢と「値→表示名」の逆引きはシーンごとに作らず1回だけ用意
+    option_names = list(animation_type_options.keys())
+    value_to_option = {v: k for k, v in animation_type_options.items()}
+    
+    # Expanderで折りたたみ可能にする
+    with st.expander("📋 各シーンのアニメーション設定", expanded=True):
+        # 3列レイアウトで表示（シーンを3つずつのグループに分ける）
+        num_cols = 3
+        
+        # シーンを3つずつのグループに分ける
+        for group_start in range(0, len(scenes), num_cols):
+            group_scenes = scenes[group_start:group_start + num_cols]
+            cols = st.columns(num_cols)
+            
+            for col_idx, scene in enumerate(group_scenes):
+                scene_number = scene.get("scene_number")
+                scene_key = str(scene_number)
+                
+                with cols[col_idx]:
+                    # シーン番号を表示
+                    st.markdown(f"### シーン {scene_number}")
+                    
+                    # 画像を表示（縮小したJPEGをdata URIで埋め込み、元画像の転送を避ける。約15%サイズ = 162px）
+                    scene_image_path = image_files.get(scene_key)
+                    scene_thumbnail = _image_thumbnail(scene_image_path)
+                    if scene_thumbnail is not None:
+                        st.markdown(
+                            f'<img src="data:image/jpeg;base64,{scene_thumbnail}" width="162">',
+                            unsafe_allow_html=True
+                        )
+                        st.caption(f"シーン{scene_number}の画像")
+                    else:
+                        st.warning(f"シーン{scene_number}の画像を読み込めません")
+                    
+                    # 現在の設定を取得（既にランダムに設定済み）
+                    current_animation = st.session_state.video_animation_types.get(scene_key, None)
+                    # 設定がない場合は「なし」をデフォルトに（通常は発生しない）
+                    current_option = value_to_option.get(current_animation, "なし")
+                    
+                    # セレクトボックスで選択
+                    selected_option = st.selectbox(
+                        f"アニメーション",
+                        options=option_names,
+                        index=option_names.index(current_option),
+                        key=f"animation_scene_{scene_number}",
+                        help=f"シーン{scene_number}に適用するアニメーションを選択"
+                    )
+                    
+                    selected_animation_type = animation_type_options[selected_option]
+                    if selected_animation_type:
+                        st.session_state.video_animation_types[scene_key] = selected_animation_type
+                    else:
+                        # 「なし」が選択された場合は辞書から削除
+                        if scene_key in st.session_state.video_animation_types:
+                            del st.session_state.video_animation_types[scene_key]
+                    
+                    st.markdown("---")  # 区切り線
+            
+            # グループ間にスペースを追加（最後のグループ以外）
+            if group_start + num_cols < len(scenes):
+                st.markdown("<br>", unsafe_allow_html=True)
 
 
 def get_cookie_manager():
@@ -39,6 +298,20 @@ def get_cookie_manager():
     return st.session_state.cookie_manager
 
 
+def _dumps_settings(settings: dict) -> str:
+    """設定値をJSON文字列に変換（キー順を固定して、同じ設定なら同じ文字列になるようにする）"""
+    if orjson is not None:
+        return orjson.dumps(settings, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return json.dumps(settings, sort_keys=True)
+
+
+def _loads_settings(value: str) -> dict:
+    """JSON文字列から設定値を復元"""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
 def load_video_settings_from_cookie(cookie_manager):
     """クッキーから設定値を読み込む"""
     settings = {}
@@ -48,7 +321,7 @@ def load_video_settings_from_cookie(cookie_manager):
         if all_cookies and "video_settings" in all_cookies:
             cookie_value = all_cookies["video_settings"]
             if cookie_value:
-                settings = json.loads(cookie_value) if isinstance(cookie_value, str) else cookie_value
+                settings = _loads_settings(cookie_value) if isinstance(cookie_value, str) else cookie_value
                 logger.debug(f"クッキーから設定を読み込みました: {settings}")
     except Exception as e:
         logger.debug(f"クッキー読み込みエラー: {e}")
@@ -58,7 +331,7 @@ def load_video_settings_from_cookie(cookie_manager):
 def save_video_settings_to_cookie(cookie_manager, settings):
     """クッキーに設定値を保存"""
     try:
-        cookie_manager.set("video_settings", json.dumps(settings), key="video_settings_set")
+        cookie_manager.set("video_settings", _dumps_settings(settings), key="video_settings_set")
     except Exception as e:
         logger.debug(f"クッキー保存エラー: {e}")
 
@@ -71,18 +344,20 @@ def show_video_page():
     # クッキーマネージャーの初期化
     cookie_manager = get_cookie_manager()
     
-    # クッキーから設定を読み込み
-    # 注意: CookieManagerは非同期なので、最初のレンダリングでは値が取得できないことがある
-    saved_settings = load_video_settings_from_cookie(cookie_manager)
+    # 背景動画（ショート用）の一覧は初期値の決定と選択欄の両方で使うため1回だけ取得
+    bg_videos = _cached_list_bgvideos(file_manager.bgvideos_dir.stat().st_mtime_ns)
     
     # クッキーから読み込んだ設定をセッションステートに反映（初回のみ）
     if "video_settings_loaded" not in st.session_state:
+        # クッキーから設定を読み込み（セッションの初回のみ）
+        # 注意: CookieManagerは非同期なので、最初のレンダリングでは値が取得できないことがある
+        saved_settings = load_video_settings_from_cookie(cookie_manager)
+        
         # デフォルト値の設定（仕様書に基づく）
         default_bg_video = "なし（背景動画を使用しない）"
-        bg_videos = file_manager.list_bgvideos()
         if bg_videos:
-            # 最新のファイルを選択（更新日時でソート済み）
-            latest_bg = sorted(bg_videos, key=lambda x: x.stat().st_mtime, reverse=True)[0]
+            # 最新のファイルを選択（更新日時が最大のもの）
+            latest_bg = max(bg_videos, key=lambda x: x.stat().st_mtime)
             default_bg_video = latest_bg.name
         
         if saved_settings:
@@ -101,6 +376,8 @@ def show_video_page():
             st.session_state.video_bgm_selected = saved_settings.get("bgm", "なし（BGMを使用しない）")
             st.session_state.video_bgm_volume = saved_settings.get("bgm_volume", 0.1)  # デフォルト：0.1
             st.session_state.video_format = saved_settings.get("video_format", "short")
+            st.session_state.video_quality = saved_settings.get("quality", "standard")
+            st.session_state.video_use_gpu = saved_settings.get("use_gpu", False)
         else:
             # クッキーが読み込まれていない場合は、デフォルト値を設定
             st.session_state.video_add_subtitles = True
@@ -124,28 +401,20 @@ def show_video_page():
                 st.session_state.video_bgm_selected = "なし（BGMを使用しない）"
             st.session_state.video_bgm_volume = 0.1  # デフォルト：0.1
             st.session_state.video_format = "short"
+            st.session_state.video_quality = "standard"  # デフォルト：標準（固定ビットレート）
+            st.session_state.video_use_gpu = False  # デフォルト：オフ（CPUエンコード）
         st.session_state.video_settings_loaded = True
     
-    # セッションステートの初期化
-    if "video_editor" not in st.session_state:
-        try:
-            st.session_state.video_editor = VideoEditor()
-        except Exception as e:
-            st.error(f"⚠️ 動画エディタの初期化に失敗しました: {e}")
-            st.info("MoviePyとFFmpegが正しくインストールされているか確認してください。")
-            return
-    
     # 台本の読み込み
     st.subheader("📝 台本の選択")
     
-    script_files = file_manager.list_scripts()
+    script_file_options = _script_options(file_manager.scripts_dir.stat().st_mtime_ns)
     
-    if not script_files:
+    if not script_file_options:
         st.warning("保存された台本がありません。まず「📝 台本生成」ページで台本を生成・保存してください。")
         return
     
     # 台本ファイルの選択（別画面から戻っても選択を保持）
-    script_file_options = {f.name: f for f in script_files}
     script_options_list = list(script_file_options.keys())
     if "video_page_selected_script" not in st.session_state:
         st.session_state.video_page_selected_script = script_options_list[0] if script_options_list else None
@@ -162,11 +431,11 @@ def show_video_page():
     st.session_state.video_page_selected_script = selected_script_name
     
     if selected_script_name:
-        selected_script_path = script_file_options[selected_script_name]
+        selected_script_path = Path(script_file_options[selected_script_name])
         
         # 台本を読み込み
         try:
-            script_data = file_manager.load_script(selected_script_path)
+            script_data = _load_script_cached(str(selected_script_path), selected_script_path.stat().st_mtime_ns)
             
             # 台本データの検証
             if not isinstance(script_data, dict):
@@ -282,70 +551,67 @@ def show_video_page():
     
     # フォーマットに応じて画像マッピングと画像ディレクトリを選択
     script_name = selected_script_name.replace(".json", "")
-    image_mapping = file_manager.load_image_mapping(script_name, is_long=is_long_format)
     images_dir = file_manager.images_long_dir if is_long_format else file_manager.images_dir
+    mapping_path = file_manager.get_image_mapping_path(script_name, is_long=is_long_format)
+    mapping_mtime = mapping_path.stat().st_mtime_ns if mapping_path.exists() else None
     
-    # 画像ファイルと音声ファイルの確認
-    image_files: Dict[str, Path] = {}
-    audio_files: Dict[str, Path] = {}
-    
-    missing_images = []
-    missing_audio = []
-    
-    for scene in scenes:
-        scene_number = scene.get("scene_number")
-        scene_key = str(scene_number)
-        
-        # まず画像マッピング情報から検索（画像生成画面で割り当てた画像を優先）
-        found_image = None
-        if image_mapping and scene_key in image_mapping:
-            mapped_image_path = image_mapping[scene_key]
-            if mapped_image_path.exists():
-                found_image = mapped_image_path
+    # 台本・画像マッピング・素材ディレクトリが前回から変わっていなければ前回の確認結果を再利用する
+    images_dir_mtime = images_dir.stat().st_mtime_ns
+    audio_dir_mtime = file_manager.audio_dir.stat().st_mtime_ns
+    asset_scan_key = (
+        selected_script_name,
+        is_long_format,
+        selected_script_path.stat().st_mtime_ns,
+        mapping_mtime,
+        images_dir_mtime,
+        audio_dir_mtime,
+    )
+    if st.session_state.get("_asset_scan_key") == asset_scan_key:
+        image_files, audio_files, missing_images, missing_audio = st.session_state._asset_scan_result
+    else:
+        image_mapping = _load_image_mapping_cached(script_name, is_long_format, mapping_mtime)
         
-        # マッピング情報にない場合は、ファイル検索で探す
-        if not found_image:
-            image_patterns = [
-                f"image_scene{scene_number:03d}_*.png",
-                f"image_scene{scene_number:03d}_*.PNG",
-                f"image_scene{scene_number:03d}_*.jpg",
-                f"image_scene{scene_number:03d}_*.JPG",
-                f"image_scene{scene_number:03d}_*.jpeg",
-                f"image_scene{scene_number:03d}_*.JPEG"
-            ]
-            
-            for pattern in image_patterns:
-                matches = list(images_dir.glob(pattern))
-                if matches:
-                    # 最新のファイルを使用（複数ある場合）
-                    found_image = sorted(matches, key=lambda x: x.stat().st_mtime, reverse=True)[0]
-                    break
+        # 画像ファイルと音声ファイルの確認
+        image_files: Dict[str, Path] = {}
+        audio_files: Dict[str, Path] = {}
         
-        if found_image:
-            image_files[scene_key] = found_image
-        else:
-            missing_images.append(scene_number)
+        missing_images = []
+        missing_audio = []
         
-        # 音声ファイルの検索（大文字・小文字両方に対応）
-        audio_patterns = [
-            f"audio_scene{scene_number:03d}_*.mp3",
-            f"audio_scene{scene_number:03d}_*.MP3",
-            f"audio_scene{scene_number:03d}_*.wav",
-            f"audio_scene{scene_number:03d}_*.WAV"
-        ]
+        # 画像・音声ディレクトリはそれぞれ1回だけ走査してシーン番号で引けるようにする
+        image_index = _index_scene_assets(str(images_dir), images_dir_mtime, "image")
+        audio_index = _index_scene_assets(str(file_manager.audio_dir), audio_dir_mtime, "audio")
         
-        found_audio = None
-        for pattern in audio_patterns:
-            matches = list(file_manager.audio_dir.glob(pattern))
-            if matches:
-                # 最新のファイルを使用（複数ある場合）
-                found_audio = sorted(matches, key=lambda x: x.stat().st_mtime, reverse=True)[0]
-                break
+        for scene in scenes:
+            scene_number = scene.get("scene_number")
+            scene_key = str(scene_number)
+            
+            # まず画像マッピング情報から検索（画像生成画面で割り当てた画像を優先）
+            found_image = None
+            if image_mapping and scene_key in image_mapping:
+                mapped_image_path = image_mapping[scene_key]
+                if mapped_image_path.exists():
+                    found_image = mapped_image_path
+            
+            # マッピング情報にない場合は、ファイル名のシーン番号から探す（複数ある場合は最新）
+            if not found_image:
+                found_image = image_index.get(scene_number)
+            
+            if found_image:
+                image_files[scene_key] = found_image
+            else:
+                missing_images.append(scene_number)
+            
+            # 音声ファイルの検索（大文字・小文字両方に対応）
+            found_audio = audio_index.get(scene_number)
+            
+            if found_audio:
+                audio_files[scene_key] = found_audio
+            else:
+                missing_audio.append(scene_number)
         
-        if found_audio:
-            audio_files[scene_key] = found_audio
-        else:
-            missing_audio.append(scene_number)
+        st.session_state._asset_scan_key = asset_scan_key
+        st.session_state._asset_scan_result = (image_files, audio_files, missing_images, missing_audio)
     
     # ファイルの存在確認結果を表示
     col1, col2 = st.columns(2)
@@ -387,10 +653,9 @@ def show_video_page():
         st.session_state.video_subtitle_bottom_offset = 500  # デフォルト：500px
     if "video_bg_video_selected" not in st.session_state:
         # デフォルト：最新の背景動画を選択
-        bg_videos = file_manager.list_bgvideos()
         if bg_videos:
-            # 最新のファイルを選択（更新日時でソート済み）
-            latest_bg = sorted(bg_videos, key=lambda x: x.stat().st_mtime, reverse=True)[0]
+            # 最新のファイルを選択（更新日時が最大のもの）
+            latest_bg = max(bg_videos, key=lambda x: x.stat().st_mtime)
             st.session_state.video_bg_video_selected = latest_bg.name
         else:
             st.session_state.video_bg_video_selected = "なし（背景動画を使用しない）"
@@ -489,11 +754,11 @@ def show_video_page():
     
     # 背景動画の選択（フォーマットに応じてショート用 or 長尺用フォルダ）
     if is_long_format:
-        bg_video_files = file_manager.list_bgvideos_long()
+        bg_video_files = _cached_list_bgvideos_long(file_manager.bgvideos_long_dir.stat().st_mtime_ns)
         bg_videos_dir = file_manager.bgvideos_long_dir
         bg_folder_hint = "`output/bgvideos_long/`"
     else:
-        bg_video_files = file_manager.list_bgvideos()
+        bg_video_files = bg_videos
         bg_videos_dir = file_manager.bgvideos_dir
         bg_folder_hint = "`output/bgvideos/`"
     bg_video_path = None
@@ -620,9 +885,6 @@ def show_video_page():
             # アニメーションタイプの値のみ（「なし」を除く）
             animation_type_values = ["zoom_in", "slide_left", "slide_right", "slide_up", "slide_down"]
             
-            # 各シーンごとにアニメーションを選択
-            animation_types = {}
-            
             # 各シーンに対して設定がない場合のみランダムに初期値を設定（連続しないように）
             previous_animation = None
             for scene in scenes:
@@ -630,86 +892,28 @@ def show_video_page():
                 scene_key = str(scene_number)
                 # 設定がない場合のみランダムにアニメーションタイプを設定
                 if scene_key not in st.session_state.video_animation_types:
-                    # 前のシーンのアニメーションを除外したリストから選択
-                    available_animations = [
-                        anim for anim in animation_type_values 
-                        if anim != previous_animation
-                    ]
-                    # 前のシーンと同じアニメーションしか残っていない場合は全種類から選択
-                    if not available_animations:
-                        available_animations = animation_type_values
-                    
-                    random_animation = random.choice(available_animations)
+                    if previous_animation in animation_type_values:
+                        # 前のシーンのアニメーション以外から選択（前の位置から1〜n-1個ずらす。候補リストは作らない）
+                        previous_idx = animation_type_values.index(previous_animation)
+                        offset = 1 + random.randrange(len(animation_type_values) - 1)
+                        random_animation = animation_type_values[(previous_idx + offset) % len(animation_type_values)]
+                    else:
+                        random_animation = random.choice(animation_type_values)
                     st.session_state.video_animation_types[scene_key] = random_animation
                     previous_animation = random_animation
                 else:
                     # 既に設定されている場合は、それを前のアニメーションとして記録
                     previous_animation = st.session_state.video_animation_types[scene_key]
             
-            # Expanderで折りたたみ可能にする
-            with st.expander("📋 各シーンのアニメーション設定", expanded=True):
-                # 3列レイアウトで表示（シーンを3つずつのグループに分ける）
-                num_cols = 3
-                
-                # シーンを3つずつのグループに分ける
-                for group_start in range(0, len(scenes), num_cols):
-                    group_scenes = scenes[group_start:group_start + num_cols]
-                    cols = st.columns(num_cols)
-                    
-                    for col_idx, scene in enumerate(group_scenes):
-                        scene_number = scene.get("scene_number")
-                        scene_key = str(scene_number)
-                        
-                        with cols[col_idx]:
-                            # シーン番号を表示
-                            st.markdown(f"### シーン {scene_number}")
-                            
-                            # 画像を表示（バイト読み込みで表示の安定化。約15%サイズ = 162px）
-                            scene_image_path = image_files.get(scene_key)
-                            scene_image_bytes = _image_path_to_bytes(scene_image_path)
-                            if scene_image_bytes is not None:
-                                st.image(
-                                    scene_image_bytes,
-                                    caption=f"シーン{scene_number}の画像",
-                                    width=162
-                                )
-                            else:
-                                st.warning(f"シーン{scene_number}の画像を読み込めません")
-                            
-                            # 現在の設定を取得（既にランダムに設定済み）
-                            current_animation = st.session_state.video_animation_types.get(scene_key, None)
-                            current_option = None
-                            for option_name, option_value in animation_type_options.items():
-                                if option_value == current_animation:
-                                    current_option = option_name
-                                    break
-                            if current_option is None:
-                                # 設定がない場合は「なし」をデフォルトに（通常は発生しない）
-                                current_option = "なし"
-                            
-                            # セレクトボックスで選択
-                            selected_option = st.selectbox(
-                                f"アニメーション",
-                                options=list(animation_type_options.keys()),
-                                index=list(animation_type_options.keys()).index(current_option),
-                                key=f"animation_scene_{scene_number}",
-                                help=f"シーン{scene_number}に適用するアニメーションを選択"
-                            )
-                            
-                            selected_animation_type = animation_type_options[selected_option]
-                            if selected_animation_type:
-                                animation_types[scene_key] = selected_animation_type
-                                st.session_state.video_animation_types[scene_key] = selected_animation_type
-                            else:
-                                # 「なし」が選択された場合は辞書から削除
-                                if scene_key in st.session_state.video_animation_types:
-                                    del st.session_state.video_animation_types[scene_key]
-                            
-                            st.markdown("---")  # 区切り線
-                    
-                    # グループ間にスペースを追加（最後のグループ以外）
-                    if group_start + num_cols < len(scenes):
-                        st.markdown("<br>", unsafe_allow_html=True)
+            # 各シーンのアニメーション設定欄（変更時はこの部分だけ再実行される）
+            _render_animation_grid(scenes, image_files, animation_type_options)
+            
+            # 生成に渡すのは現在の台本のシーン分のみ（フラグメント内の選択結果はセッションステートから取得）
+            animation_types = {}
+            for scene in scenes:
+                scene_key = str(scene.get("scene_number"))
+                if scene_key in st.session_state.video_animation_types:
+                    animation_types[scene_key] = st.session_state.video_animation_types[scene_key]
         else:
             # ランダムモードの場合
             st.info("💡 各シーンにランダムで以下のアニメーションが適用されます：\n"
@@ -719,6 +923,34 @@ def show_video_page():
                     "- 上から下へスライド\n"
                     "- 下から上へスライド")
     
+    st.markdown("---")
+    st.subheader("⚙️ 書き出し設定")
+    
+    # 書き出し画質の選択（"standard" は従来どおり固定ビットレートで書き出す）
+    quality_options = {
+        "standard": "標準（固定ビットレート）",
+        "preview": "プレビュー（高速・低画質）",
+        "balanced": "バランス",
+        "final": "高画質（低速）",
+    }
+    quality_keys = list(quality_options.keys())
+    if st.session_state.get("video_quality") not in quality_options:
+        st.session_state.video_quality = "standard"
+    st.session_state.video_quality = st.selectbox(
+        "書き出し画質",
+        options=quality_keys,
+        index=quality_keys.index(st.session_state.video_quality),
+        format_func=quality_options.get,
+        help="プレビューは書き出しが速く、高画質は時間がかかります"
+    )
+    
+    # ハードウェアエンコーダの使用（使えない環境では自動的にCPUエンコードで書き出す）
+    st.session_state.video_use_gpu = st.checkbox(
+        "GPUエンコードを使用",
+        value=st.session_state.get("video_use_gpu", False),
+        help="NVENC / AMF / VideoToolbox が使える場合は書き出しが速くなります。GPUエンコード時は書き出し画質の設定は反映されません。"
+    )
+    
     # 設定をクッキーに保存
     current_settings = {
         "add_subtitles": st.session_state.video_add_subtitles,
@@ -735,9 +967,15 @@ def show_video_page():
         "animation_types": st.session_state.video_animation_types,
         "bgm": st.session_state.video_bgm_selected,
         "bgm_volume": st.session_state.video_bgm_volume,
-        "video_format": st.session_state.video_format
+        "video_format": st.session_state.video_format,
+        "quality": st.session_state.video_quality,
+        "use_gpu": st.session_state.video_use_gpu
     }
-    save_video_settings_to_cookie(cookie_manager, current_settings)
+    # 前回保存時から変更があった場合のみクッキーに書き込む（毎回のリランで書き込まない）
+    settings_hash = hash(_dumps_settings(current_settings))
+    if st.session_state.get("_video_settings_hash") != settings_hash:
+        save_video_settings_to_cookie(cookie_manager, current_settings)
+        st.session_state._video_settings_hash = settings_hash
     
     st.markdown("---")
     st.subheader("🎬 動画生成")
@@ -752,28 +990,38 @@ def show_video_page():
             progress_bar.progress(progress)
             status_text.text(f"📹 {message} ({int(progress * 100)}%)")
         
+        # 動画エディタは生成時に初めて作成する（閲覧のみの場合は初期化しない）
+        try:
+            editor = _get_video_editor()
+        except Exception as e:
+            st.error(f"⚠️ 動画エディタの初期化に失敗しました: {e}")
+            st.info("MoviePyとFFmpegが正しくインストールされているか確認してください。")
+            return
+        
         try:
-            editor = st.session_state.video_editor
             video_width = VIDEO_WIDTH_LONG if is_long_format else None
             video_height = VIDEO_HEIGHT_LONG if is_long_format else None
-            video_path = editor.create_video_from_script(
-                script_data=script_data,
-                image_files=image_files,
-                audio_files=audio_files,
-                add_subtitles=add_subtitles,
-                subtitle_style=subtitle_style,
-                subtitle_source=subtitle_source,
-                subtitle_bottom_offset=subtitle_bottom_offset,
-                bg_video_path=bg_video_path,
-                enable_animation=enable_animation,
-                animation_scale=animation_scale,
-                animation_types=animation_types if enable_animation else None,
-                bgm_path=bgm_path,
-                bgm_volume=st.session_state.video_bgm_volume,
-                progress_callback=update_progress,
-                video_width=video_width,
-                video_height=video_height
-            )
+            with _video_editor_lock:
+                video_path = editor.create_video_from_script(
+                    script_data=script_data,
+                    image_files=image_files,
+                    audio_files=audio_files,
+                    add_subtitles=add_subtitles,
+                    subtitle_style=subtitle_style,
+                    subtitle_source=subtitle_source,
+                    subtitle_bottom_offset=subtitle_bottom_offset,
+                    bg_video_path=bg_video_path,
+                    enable_animation=enable_animation,
+                    animation_scale=animation_scale,
+                    animation_types=animation_types if enable_animation else None,
+                    bgm_path=bgm_path,
+                    bgm_volume=st.session_state.video_bgm_volume,
+                    progress_callback=update_progress,
+                    video_width=video_width,
+                    video_height=video_height,
+                    quality=None if st.session_state.video_quality == "standard" else st.session_state.video_quality,
+                    use_gpu=st.session_state.video_use_gpu
+                )
             
             st.session_state.generated_video = video_path
             st.session_state.video_just_generated = True
@@ -802,61 +1050,29 @@ def show_video_page():
         
         video_path = st.session_state.generated_video
         if video_path.exists():
-            # 動画情報を表示
-            file_size = video_path.stat().st_size / (1024 * 1024)  # MB
-            st.caption(f"ファイル名: {video_path.name} | サイズ: {file_size:.2f} MB")
-            
-            # 動画を表示（ファイルパスを直接渡す）
-            try:
-                st.video(str(video_path), format="video/mp4")
-            except Exception as e:
-                logger.error(f"動画表示エラー: {e}")
-                st.error(f"動画の表示に失敗しました: {e}")
-                # フォールバック: バイトデータで読み込み
-                try:
-                    with open(video_path, "rb") as f:
-                        video_data = f.read()
-                    st.video(video_data, format="video/mp4")
-                except Exception as e2:
-                    st.error(f"動画の読み込みに失敗しました: {e2}")
-            
-            # ダウンロードボタン（必要に応じてファイルを読み込む）
-            try:
-                with open(video_path, "rb") as f:
-                    video_data = f.read()
-                st.download_button(
-                    label="⬇️ 動画をダウンロード",
-                    data=video_data,
-                    file_name=video_path.name,
-                    mime="video/mp4",
-                    use_container_width=True,
-                    key="download_generated_video"
-                )
-            except Exception as e:
-                logger.error(f"動画ダウンロードボタンの作成エラー: {e}")
-                st.error(f"ダウンロードボタンの作成に失敗しました: {e}")
+            _render_video(video_path)
     
     # 保存済み動画の一覧
     st.markdown("---")
     st.subheader("📚 保存済み動画")
     
-    video_files = file_manager.list_video_files()
+    video_files = _cached_list_video_files(file_manager.videos_dir.stat().st_mtime_ns)
     
     if video_files:
-        for video_file in video_files[:10]:  # 最新10件を表示
+        for video_file, stat in video_files[:10]:  # 最新10件を表示
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.markdown(f"**{video_file.name}**")
-                file_size = video_file.stat().st_size / (1024 * 1024)  # MB
+                file_size = stat.st_size / (1024 * 1024)  # MB
                 st.caption(f"サイズ: {file_size:.2f} MB")
             with col2:
-                with open(video_file, "rb") as f:
-                    st.download_button(
-                        label="⬇️",
-                        data=f.read(),
-                        file_name=video_file.name,
-                        mime="video/mp4",
-                        key=f"download_{video_file.name}"
-                    )
+                # ファイル本体はダウンロードを選んだ動画だけ読み込む（一覧表示のたびに全件を読まない）
+                _video_download_button(
+                    video_file,
+                    stat,
+                    key=f"download_{video_file.name}",
+                    label="⬇️",
+                    prepare_label="📥"
+                )
     else:
         st.info("保存済みの動画がありません。")
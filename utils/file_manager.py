@@ -3,6 +3,7 @@
 ファイルの保存・読み込み管理
 """
 import json
+import os
 from pathlib import Path
 from typing import Any, Optional
 from datetime import datetime
@@ -10,8 +11,56 @@ from datetime import datetime
 from config.config import config
 from utils.logger import get_logger
 
+# orjson があればJSONの書き出しに使用（なければ標準の json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = get_logger(__name__)
 
+# 一覧取得で対象とする拡張子（小文字で比較するため大文字・小文字は区別しない）
+_IMAGE_EXTENSIONS = frozenset({"png", "jpg", "jpeg"})
+_AUDIO_EXTENSIONS = frozenset({"mp3", "wav"})
+_BGVIDEO_EXTENSIONS = frozenset({"mp4", "mov", "avi"})
+_VIDEO_EXTENSIONS = frozenset({"mp4"})
+
+
+def _has_ext(name: str, exts: frozenset[str]) -> bool:
+    """ファイル名の拡張子が指定した集合に含まれるか（大文字・小文字は区別しない）"""
+    return name.rpartition(".")[2].lower() in exts
+
+
+def _write_bytes(filepath: Path, payload: bytes):
+    """
+    バイト列をバッファを介さずにファイルへ書き込む（1回で渡すため stdio バッファへのコピーが不要）
+    
+    Args:
+        filepath: 書き込み先のパス
+        payload: 書き込むバイト列
+    """
+    with open(filepath, "wb", buffering=0) as f:
+        view = memoryview(payload)
+        # バッファなしの書き込みは一部だけ書かれる場合があるため、残りがあれば続けて書く
+        while view:
+            written = f.write(view)
+            view = view[written:]
+
+
+def _dump_json_bytes(data: Any) -> bytes:
+    """
+    データを整形済みJSON（UTF-8、インデント2）のバイト列に変換
+    
+    Args:
+        data: JSONに変換するデータ
+    
+    Returns:
+        bytes: UTF-8エンコードされたJSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
 
 class FileManager:
     """ファイル管理クラス"""
@@ -28,6 +77,57 @@ class FileManager:
         self.bgvideos_long_dir = config.output_bgvideos_long_dir
         self.images_long_dir = config.output_images_long_dir
         self.bgm_dir = config.output_bgm_dir
+        # ディレクトリ一覧のキャッシュ {(ディレクトリ, 拡張子, 降順): (ディレクトリの更新時刻, ファイル一覧)}
+        self._list_cache: dict[tuple, tuple[int, list[Path]]] = {}
+    
+    def _scan_ext(self, directory: Path, exts: frozenset[str]) -> list[Path]:
+        """
+        ディレクトリを1回だけ走査し、指定した拡張子のファイルを取得（順不同）
+        ファイル判定はディレクトリエントリの種別を使い、通常ファイルには stat を発生させない
+        （シンボリックリンクはリンク先がファイルなら対象に含める）
+        
+        Args:
+            directory: 走査するディレクトリ
+            exts: 拡張子の集合（小文字、ドットなし。例: {"mp3", "wav"}）
+        
+        Returns:
+            list[Path]: ファイルパスのリスト（ディレクトリが存在しない場合は空）
+        """
+        try:
+            with os.scandir(directory) as entries:
+                return [
+                    Path(entry.path) for entry in entries
+                    if _has_ext(entry.name, exts) and entry.is_file()
+                ]
+        except FileNotFoundError:
+            return []
+    
+    def _cached_list(self, directory: Path, exts: frozenset[str], reverse: bool = False) -> list[Path]:
+        """
+        指定した拡張子のファイルのソート済みリストを取得
+        ディレクトリの更新時刻が前回と同じ場合はキャッシュを返す（ファイルの追加・削除・名前変更で更新される）
+        
+        Args:
+            directory: 検索するディレクトリ
+            exts: 拡張子の集合（小文字、ドットなし）
+            reverse: Trueの場合は降順にソート
+        
+        Returns:
+            list[Path]: ファイルパスのリスト（呼び出し元で変更してもキャッシュに影響しないようコピーを返す）
+        """
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        
+        cache_key = (directory, exts, reverse)
+        cached = self._list_cache.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            return list(cached[1])
+        
+        files = sorted(self._scan_ext(directory, exts), reverse=reverse)
+        self._list_cache[cache_key] = (mtime, files)
+        return list(files)
     
     def save_script(self, script_data: dict, filename: Optional[str] = None) -> Path:
         """
@@ -47,8 +147,8 @@ class FileManager:
         filepath = self.scripts_dir / filename
         
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(script_data, f, ensure_ascii=False, indent=2)
+            # メモリ上でバイト列化してから1回で書き込む（json.dump はトークンごとに write する）
+            _write_bytes(filepath, _dump_json_bytes(script_data))
             
             logger.info(f"台本を保存しました: {filepath}")
             return filepath
@@ -112,7 +212,24 @@ class FileManager:
         """
         return self.videos_dir / filename
     
-    def generate_filename(self, prefix: str, extension: str, scene_number: Optional[int] = None) -> str:
+    def batch_timestamp(self) -> str:
+        """
+        一括処理用のタイムスタンプを取得
+        呼び出し元で保持して generate_filename に渡すと、1回の処理で生成するファイル名が同じタイムスタンプになる
+        （file_manager は全セッションで共有されるため、タイムスタンプは状態として保持しない）
+        
+        Returns:
+            str: タイムスタンプ（例: "20240101_120000"）
+        """
+        return datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    def generate_filename(
+        self,
+        prefix: str,
+        extension: str,
+        scene_number: Optional[int] = None,
+        timestamp: Optional[str] = None
+    ) -> str:
         """
         ファイル名を生成
         
@@ -120,11 +237,13 @@ class FileManager:
             prefix: プレフィックス（例: "audio", "image"）
             extension: 拡張子（例: "mp3", "png"）
             scene_number: シーン番号（オプション）
+            timestamp: ファイル名に使うタイムスタンプ（Noneの場合は現在時刻。batch_timestamp の値を渡す）
         
         Returns:
             str: 生成されたファイル名
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if timestamp is None:
+            timestamp = self.batch_timestamp()
         
         if scene_number is not None:
             filename = f"{prefix}_scene{scene_number:03d}_{timestamp}.{extension}"
@@ -141,14 +260,13 @@ class FileManager:
         Returns:
             list[Path]: 台本ファイルのパスのリスト
         """
-        all_json_files = self.scripts_dir.glob("*.json")
+        all_json_files = self._cached_list(self.scripts_dir, frozenset({"json"}), reverse=True)
         # 画像マッピングファイルを除外
-        script_files = [
+        return [
             f for f in all_json_files
             if not f.name.endswith("_image_mapping.json")
             and not f.name.endswith("_image_mapping_long.json")
         ]
-        return sorted(script_files, reverse=True)
     
     def list_audio_files(self) -> list[Path]:
         """
@@ -157,11 +275,7 @@ class FileManager:
         Returns:
             list[Path]: 音声ファイルのパスのリスト
         """
-        extensions = ["*.mp3", "*.wav"]
-        files = []
-        for ext in extensions:
-            files.extend(self.audio_dir.glob(ext))
-        return sorted(files, reverse=True)
+        return self._cached_list(self.audio_dir, _AUDIO_EXTENSIONS, reverse=True)
     
     def list_image_files(self) -> list[Path]:
         """
@@ -170,11 +284,7 @@ class FileManager:
         Returns:
             list[Path]: 画像ファイルのパスのリスト
         """
-        extensions = ["*.png", "*.jpg", "*.jpeg"]
-        files = []
-        for ext in extensions:
-            files.extend(self.images_dir.glob(ext))
-        return sorted(files, reverse=True)
+        return self._cached_list(self.images_dir, _IMAGE_EXTENSIONS, reverse=True)
     
     def list_video_files(self) -> list[Path]:
         """
@@ -183,7 +293,26 @@ class FileManager:
         Returns:
             list[Path]: 動画ファイルのパスのリスト
         """
-        return sorted(self.videos_dir.glob("*.mp4"), reverse=True)
+        return self._cached_list(self.videos_dir, _VIDEO_EXTENSIONS, reverse=True)
+    
+    def list_video_files_with_stat(self) -> list[tuple[Path, os.stat_result]]:
+        """
+        保存されている動画ファイルのリストを stat 結果付きで取得
+        os.scandir の DirEntry.stat() を使い、1ファイルにつき stat は1回だけにする
+        
+        Returns:
+            list[tuple[Path, os.stat_result]]: (動画ファイルのパス, stat 結果) のリスト（list_video_files と同じ降順）
+        """
+        try:
+            with os.scandir(self.videos_dir) as entries:
+                video_entries = [
+                    (Path(entry.path), entry.stat())
+                    for entry in entries
+                    if _has_ext(entry.name, _VIDEO_EXTENSIONS) and entry.is_file()
+                ]
+        except FileNotFoundError:
+            return []
+        return sorted(video_entries, key=lambda item: item[0], reverse=True)
     
     def list_stock_images(self) -> list[Path]:
         """
@@ -192,11 +321,21 @@ class FileManager:
         Returns:
             list[Path]: ストック画像ファイルのパスのリスト
         """
-        extensions = ["*.png", "*.jpg", "*.jpeg", "*.PNG", "*.JPG", "*.JPEG"]
-        files = []
-        for ext in extensions:
-            files.extend(self.stock_images_dir.glob(ext))
-        return sorted(files)
+        return self._cached_list(self.stock_images_dir, _IMAGE_EXTENSIONS)
+    
+    def get_image_mapping_path(self, script_name: str, is_long: bool = False) -> Path:
+        """
+        画像マッピングファイルのパスを取得
+        
+        Args:
+            script_name: 台本ファイル名（拡張子なし）
+            is_long: Trueの場合は長尺動画用マッピング（*_image_mapping_long.json）
+        
+        Returns:
+            Path: 画像マッピングファイルのパス
+        """
+        suffix = "_image_mapping_long.json" if is_long else "_image_mapping.json"
+        return self.scripts_dir / f"{script_name}{suffix}"
     
     def save_image_mapping(self, script_name: str, image_mapping: dict, is_long: bool = False) -> Path:
         """
@@ -210,9 +349,7 @@ class FileManager:
         Returns:
             Path: 保存されたファイルのパス
         """
-        suffix = "_image_mapping_long.json" if is_long else "_image_mapping.json"
-        mapping_filename = f"{script_name}{suffix}"
-        mapping_path = self.scripts_dir / mapping_filename
+        mapping_path = self.get_image_mapping_path(script_name, is_long=is_long)
         
         try:
             # パスを絶対パスの文字列に変換して保存（動画編集画面で確実に参照できるようにする）
@@ -221,8 +358,7 @@ class FileManager:
                 for scene_key, image_path in image_mapping.items()
             }
             
-            with open(mapping_path, "w", encoding="utf-8") as f:
-                json.dump(mapping_data, f, ensure_ascii=False, indent=2)
+            _write_bytes(mapping_path, _dump_json_bytes(mapping_data))
             
             logger.info(f"画像マッピングを保存しました: {mapping_path}")
             return mapping_path
@@ -241,9 +377,7 @@ class FileManager:
         Returns:
             dict: {シーン番号: 画像ファイルパス}の辞書、見つからない場合はNone
         """
-        suffix = "_image_mapping_long.json" if is_long else "_image_mapping.json"
-        mapping_filename = f"{script_name}{suffix}"
-        mapping_path = self.scripts_dir / mapping_filename
+        mapping_path = self.get_image_mapping_path(script_name, is_long=is_long)
         
         if not mapping_path.exists():
             return None
@@ -276,11 +410,7 @@ class FileManager:
         Returns:
             list[Path]: 背景動画ファイルのパスのリスト
         """
-        extensions = ["*.mp4", "*.MP4", "*.mov", "*.MOV", "*.avi", "*.AVI"]
-        files = []
-        for ext in extensions:
-            files.extend(self.bgvideos_dir.glob(ext))
-        return sorted(files)
+        return self._cached_list(self.bgvideos_dir, _BGVIDEO_EXTENSIONS)
 
     def list_stock_images_long(self) -> list[Path]:
         """
@@ -289,13 +419,7 @@ class FileManager:
         Returns:
             list[Path]: ストック画像ファイルのパスのリスト
         """
-        if not self.stock_images_long_dir.exists():
-            return []
-        extensions = ["*.png", "*.jpg", "*.jpeg", "*.PNG", "*.JPG", "*.JPEG"]
-        files = []
-        for ext in extensions:
-            files.extend(self.stock_images_long_dir.glob(ext))
-        return sorted(files)
+        return self._cached_list(self.stock_images_long_dir, _IMAGE_EXTENSIONS)
 
     def list_bgvideos_long(self) -> list[Path]:
         """
@@ -304,13 +428,7 @@ class FileManager:
         Returns:
             list[Path]: 背景動画ファイルのパスのリスト
         """
-        if not self.bgvideos_long_dir.exists():
-            return []
-        extensions = ["*.mp4", "*.MP4", "*.mov", "*.MOV", "*.avi", "*.AVI"]
-        files = []
-        for ext in extensions:
-            files.extend(self.bgvideos_long_dir.glob(ext))
-        return sorted(files)
+        return self._cached_list(self.bgvideos_long_dir, _BGVIDEO_EXTENSIONS)
     
     def list_bgm_files(self) -> list[Path]:
         """
@@ -319,10 +437,7 @@ class FileManager:
         Returns:
             list[Path]: BGMファイルのパスのリスト
         """
-        extensions = ["*.wav", "*.WAV"]
-        files = []
-        for ext in extensions:
-            files.extend(self.bgm_dir.glob(ext))
+        files = self._scan_ext(self.bgm_dir, frozenset({"wav"}))
         return sorted(files, key=lambda x: x.stat().st_mtime, reverse=True)  # 最新順にソート
     
     def ensure_directory_exists(self, directory: Path):
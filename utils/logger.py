@@ -2,6 +2,7 @@
 ログ管理モジュール
 """
 import logging
+import logging.handlers
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -9,6 +10,11 @@ from typing import Optional
 
 from config.config import config
 
+# 全ロガーで共有するファイル出力ハンドラ（ルートロガーに1度だけ登録する）
+_shared_file_handler: Optional[logging.handlers.RotatingFileHandler] = None
+
+_DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
 
 def setup_logger(
     name: str,
@@ -40,7 +46,7 @@ def setup_logger(
     
     # フォーマットの設定
     if format_string is None:
-        format_string = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        format_string = _DEFAULT_FORMAT
     
     formatter = logging.Formatter(format_string, datefmt="%Y-%m-%d %H:%M:%S")
     
@@ -63,10 +69,37 @@ def setup_logger(
     return logger
 
 
+def _ensure_shared_file_handler() -> None:
+    """
+    共有のファイルハンドラをルートロガーに登録する（初回のみ）
+    
+    ローテーション付きの1ファイル（createmovie.log）に全モジュールのログをまとめ、
+    モジュールごとにファイルを開かないようにする。
+    ログは記録ごとに書き出す（長時間動くサーバーでもログが遅れたり、強制終了時に失われたりしないように）。
+    """
+    global _shared_file_handler
+    if _shared_file_handler is not None:
+        return
+    
+    config.log_dir.mkdir(parents=True, exist_ok=True)
+    
+    _shared_file_handler = logging.handlers.RotatingFileHandler(
+        config.log_dir / "createmovie.log",
+        maxBytes=10_000_000,
+        backupCount=5,
+        encoding="utf-8"
+    )
+    _shared_file_handler.setLevel(logging.DEBUG)
+    _shared_file_handler.setFormatter(logging.Formatter(_DEFAULT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+    logging.getLogger().addHandler(_shared_file_handler)
+
+
 def get_logger(name: str = __name__) -> logging.Logger:
     """
     ロガーを取得（簡易版）
     
+    コンソール出力はロガーごとに設定し、ファイル出力はルートロガーの共有ハンドラへ伝播させる。
+    
     Args:
         name: ロガー名（デフォルトは呼び出し元のモジュール名）
     
@@ -77,8 +110,9 @@ def get_logger(name: str = __name__) -> logging.Logger:
     
     # まだ設定されていない場合は設定する
     if not logger.handlers:
-        log_file = config.log_dir / f"{name}.log"
-        return setup_logger(name, log_file=log_file)
+        _ensure_shared_file_handler()
+        logger = setup_logger(name)
+        logger.propagate = True
     
     return logger
 
@@ -4,7 +4,12 @@ MoviePyを使用して動画を生成
 """
 from typing import Optional, Dict, Callable
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import random
+import subprocess
+import threading
+import traceback
 
 # Pillow 10.0.0以降との互換性パッチ
 try:
@@ -24,6 +29,7 @@ from moviepy.audio.AudioClip import CompositeAudioClip, concatenate_audioclips
 from moviepy.audio.fx.volumex import volumex
 from moviepy.video.compositing.concatenate import concatenate_videoclips
 from moviepy.video.fx.resize import resize as _resize_fx
+from moviepy.video.fx.loop import loop as vfx_loop
 
 
 def resize_fx(clip, *args, **kwargs):
@@ -44,6 +50,12 @@ ANIMATION_TYPES = [
     "slide_down",   # 上から下へスライド
 ]
 
+# ランダムモードで選べるアニメーションタイプ {前のシーンのタイプ: 候補}（前のシーンと同じタイプは除く）
+_ANIM_CHOICES_BY_PREV = {
+    None: tuple(ANIMATION_TYPES),
+    **{prev: tuple(anim for anim in ANIMATION_TYPES if anim != prev) for prev in ANIMATION_TYPES},
+}
+
 from config.config import config
 from config.constants import (
     VIDEO_WIDTH,
@@ -60,6 +72,128 @@ from utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+# 字幕用フォントの候補（日本語対応フォントを優先）
+FONT_PATHS = [
+    # macOSの日本語フォント（優先順位順）
+    "/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc",  # 太字
+    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",  # 通常
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/System/Library/Fonts/Arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+]
+
+
+@functools.lru_cache(maxsize=8)
+def _load_font(fontsize: int):
+    """
+    字幕用フォントを読み込む（フォントサイズごとに1度だけ読み込み、以降はキャッシュを返す）
+    
+    Args:
+        fontsize: フォントサイズ
+    
+    Returns:
+        フォント（読み込めない場合はNone）
+    """
+    for font_path in FONT_PATHS:
+        try:
+            if font_path.endswith('.ttc'):
+                # TTCファイルの場合はフォントインデックスを指定
+                font = ImageFont.truetype(font_path, fontsize, index=0)
+            else:
+                font = ImageFont.truetype(font_path, fontsize)
+            logger.info(f"フォントを読み込みました: {font_path}")
+            return font
+        except Exception as e:
+            logger.debug(f"フォント読み込み失敗: {font_path} - {e}")
+            continue
+    
+    # デフォルトフォントを使用（日本語非対応の可能性あり）
+    try:
+        font = ImageFont.load_default()
+        logger.warning("デフォルトフォントを使用します（日本語が表示されない可能性があります）")
+        return font
+    except Exception:
+        return None
+
+
+# 優先して使うハードウェアH.264エンコーダ（上から順に検出）
+_HW_ENCODERS = ("h264_nvenc", "h264_amf", "h264_videotoolbox")
+
+# エンコーダごとの追加 ffmpeg パラメータ
+# （MoviePyは libx264 以外では -pix_fmt を付けないため、再生互換性のある yuv420p を明示する）
+_ENCODER_FFMPEG_PARAMS = {
+    "h264_nvenc": ["-preset", "p5", "-rc", "vbr", "-cq", "23", "-pix_fmt", "yuv420p"],
+    "h264_amf": ["-quality", "balanced", "-rc", "vbr_peak", "-pix_fmt", "yuv420p"],
+    "h264_videotoolbox": ["-q:v", "50", "-pix_fmt", "yuv420p"],
+}
+
+# ハードウェアエンコーダでの書き出し時に MoviePy が付ける -preset
+# （MoviePy は -preset を必ず付けるため、動作確認でも同じ値を渡して実際の書き出しと同じ引数で試す）
+_HW_WRITE_PRESET = "medium"
+
+# 書き出しに失敗したハードウェアエンコーダ（以降の動画生成では使わない）
+_FAILED_HW_ENCODERS: set = set()
+
+
+# 画質ごとの libx264 設定 {画質: (preset, CRF)}
+_QUALITY_PRESETS = {
+    "preview": ("ultrafast", 23),
+    "balanced": ("veryfast", 21),
+    "final": ("medium", 19),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _probe_ffmpeg_encoders() -> Optional[str]:
+    """
+    ffmpeg で実際に使えるハードウェアH.264エンコーダを検出（初回のみ実行）
+    
+    ffmpeg のビルドによってはGPUがなくてもエンコーダが一覧に表示されるため、
+    一覧にあるエンコーダで1フレームだけ試しにエンコードして確認する。
+    
+    Returns:
+        Optional[str]: エンコーダ名（使えるものがない場合はNone）
+    """
+    try:
+        from moviepy.config import get_setting
+        ffmpeg_binary = get_setting("FFMPEG_BINARY")
+        result = subprocess.run(
+            [ffmpeg_binary, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except Exception as e:
+        logger.debug(f"ffmpeg エンコーダの検出に失敗しました: {e}")
+        return None
+    
+    for encoder in _HW_ENCODERS:
+        if encoder not in result.stdout:
+            continue
+        try:
+            test = subprocess.run(
+                [
+                    ffmpeg_binary, "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "color=c=black:s=256x256:d=1",
+                    "-frames:v", "1",
+                    "-c:v", encoder, "-preset", _HW_WRITE_PRESET,
+                    *_ENCODER_FFMPEG_PARAMS[encoder],
+                    "-f", "null", "-"
+                ],
+                capture_output=True,
+                text=True,
+                timeout=20
+            )
+        except Exception as e:
+            logger.debug(f"{encoder} の動作確認に失敗しました: {e}")
+            continue
+        if test.returncode == 0:
+            logger.info(f"ハードウェアエンコーダを使用します: {encoder}")
+            return encoder
+        logger.debug(f"{encoder} は使用できません: {test.stderr.strip()}")
+    return None
+
+
 def _ensure_ismask(clip):
     """MoviePy の blit/resize で参照される ismask が無い場合に付与する。"""
     if clip is not None and not hasattr(clip, "ismask"):
@@ -70,11 +204,24 @@ def _ensure_ismask(clip):
 class VideoEditor:
     """動画編集クラス"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: ランダムモードでのアニメーション選択に使う乱数シード（Noneの場合は毎回異なる）
+        """
         self.width = VIDEO_WIDTH
         self.height = VIDEO_HEIGHT
         self.fps = VIDEO_FPS
         self.bitrate = VIDEO_BITRATE
+        self._rng = random.Random(seed)
+        # 字幕画像のキャッシュ {(テキスト, スタイル, 折り返し幅, 動画幅): 画像配列}（動画生成ごとにクリア）
+        self._subtitle_cache: Dict[tuple, np.ndarray] = {}
+        # 字幕合成の出力フレームバッファ {(高さ, 幅, チャンネル数): 配列}（フレームごとの確保を避けて使い回す）
+        self._frame_buffers: Dict[tuple, np.ndarray] = {}
+        # アニメーション用に拡大した画像のキャッシュ {(画像パス, サイズ): 画像配列}（動画生成ごとにクリア）
+        self._scaled_image_cache: Dict[tuple, np.ndarray] = {}
+        # 字幕描画のロック（シーンのクリップ作成を並列化しているため、フォントの同時使用を避ける）
+        self._subtitle_lock = threading.Lock()
     
     def create_video_from_script(
         self,
@@ -94,7 +241,9 @@ class VideoEditor:
         bgm_volume: float = 0.1,
         progress_callback: Optional[Callable[[str, float], None]] = None,
         video_width: Optional[int] = None,
-        video_height: Optional[int] = None
+        video_height: Optional[int] = None,
+        quality: Optional[str] = None,
+        use_gpu: bool = False
     ) -> Path:
         """
         台本データから動画を生成
@@ -116,6 +265,9 @@ class VideoEditor:
             bgm_volume: BGMの音量（0.0-1.0、デフォルト: 0.1）
             video_width: 出力動画の幅（Noneの場合はショート 1080、長尺時は 1920）
             video_height: 出力動画の高さ（Noneの場合はショート 1920、長尺時は 1080）
+            quality: CPUエンコード時の画質（"preview" / "balanced" / "final"。Noneの場合は固定ビットレート）
+            use_gpu: ハードウェアエンコーダ（NVENC / AMF / VideoToolbox）が使える場合に使うか
+                （画質・ビットレートの決め方がCPUエンコードと異なり、quality は反映されない）
         
         Returns:
             Path: 生成された動画ファイルのパス
@@ -127,6 +279,10 @@ class VideoEditor:
         else:
             self.width, self.height = VIDEO_WIDTH, VIDEO_HEIGHT
 
+        # 字幕画像・拡大画像のキャッシュは1回の動画生成の中でだけ使う（メモリを使い続けないようにする）
+        self._subtitle_cache.clear()
+        self._scaled_image_cache.clear()
+
         scenes = script_data.get("scenes", [])
         if not scenes:
             raise ValueError("台本にシーンがありません")
@@ -162,15 +318,14 @@ class VideoEditor:
                 "align": "center"
             }
         
-        video_clips = []
+        # 処理対象のシーンとアニメーションタイプをシーン順に決定
+        # （ランダムモードは前のシーンと異なるタイプを選ぶため、ここだけは逐次処理）
+        scene_tasks = []
         previous_animation_type = None  # 前のシーンのアニメーションタイプを記録
         
         for scene in scenes:
             scene_number = scene.get("scene_number")
             scene_key = str(scene_number)
-            duration = scene.get("duration", 3.0)
-            # 字幕のソースに応じてテキストを取得
-            subtitle_text = scene.get(subtitle_source, "")
             
             # 画像ファイルの取得
             image_path = image_files.get(scene_key)
@@ -184,62 +339,67 @@ class VideoEditor:
                 logger.warning(f"シーン{scene_number}の音声ファイルが見つかりません: {audio_path}")
                 continue
             
+            # アニメーションタイプの決定（Noneの場合は通常のリサイズ）
+            animation_type = None
+            if enable_animation:
+                if animation_types is not None:
+                    # 個別指定モード：animation_types辞書に含まれているシーンのみアニメーションを適用
+                    # 「なし」や未設定のシーンはアニメーションなし（前のアニメーションは保持）
+                    animation_type = animation_types.get(scene_key)
+                    if animation_type:
+                        previous_animation_type = animation_type  # 次のシーンのために記録
+                else:
+                    # ランダムモード：ランダムにアニメーションタイプを選択（前のシーンと異なるものを選択）
+                    animation_type = self._rng.choice(
+                        _ANIM_CHOICES_BY_PREV.get(previous_animation_type, ANIMATION_TYPES)
+                    )
+                    previous_animation_type = animation_type  # 次のシーンのために記録
+            else:
+                previous_animation_type = None  # アニメーションなしの場合はリセット
+            
+            # 字幕のソースに応じてテキストを取得
+            subtitle_text = scene.get(subtitle_source, "")
+            scene_tasks.append((scene_number, image_path, audio_path, animation_type, subtitle_text))
+        
+        def build_scene_clip(task):
+            """1シーン分の動画クリップを作成（ワーカースレッドで実行）"""
+            scene_number, image_path, audio_path, animation_type, subtitle_text = task
             try:
                 # 音声クリップの読み込み（先に読み込んでdurationを取得）
                 audio_clip = AudioFileClip(str(audio_path))
                 actual_duration = audio_clip.duration
                 
-                # 画像クリップの作成
-                image_clip = ImageClip(str(image_path))
+                # アニメーションなしで字幕がある場合は、字幕を画像に焼き込んだ静止画を1枚だけ作る
+                # （書き出し時にフレームごとに字幕を合成する処理を省く）
+                if not animation_type and add_subtitles and subtitle_text:
+                    frame = self._compose_subtitled_frame(
+                        image_path,
+                        subtitle_text,
+                        subtitle_style,
+                        subtitle_bottom_offset
+                    )
+                    if frame is not None:
+                        video_clip = ImageClip(frame).set_duration(actual_duration).set_audio(audio_clip)
+                        _ensure_ismask(video_clip)
+                        logger.info(f"シーン{scene_number}の動画クリップを作成しました（長さ: {actual_duration:.2f}秒）")
+                        return video_clip
                 
                 # アニメーションの適用
-                animation_type = None
-                if enable_animation:
-                    # アニメーションタイプの決定
-                    if animation_types is not None:
-                        # 個別指定モード：animation_types辞書に含まれているシーンのみアニメーションを適用
-                        if scene_key in animation_types:
-                            animation_type = animation_types[scene_key]
-                            if animation_type:  # None（「なし」）の場合はアニメーションを適用しない
-                                previous_animation_type = animation_type  # 次のシーンのために記録
-                                logger.info(f"シーン{scene_number}にアニメーション適用: {animation_type}")
-                                # アニメーション付きクリップを作成
-                                image_clip = self._apply_animation(
-                                    image_clip,
-                                    animation_type,
-                                    actual_duration,
-                                    animation_scale
-                                )
-                            else:
-                                # 「なし」が選択された場合はアニメーションなし（前のアニメーションは保持）
-                                image_clip = resize_fx(image_clip, (self.width, self.height))
-                        else:
-                            # 個別指定モードで設定されていないシーンはアニメーションなし（前のアニメーションは保持）
-                            image_clip = resize_fx(image_clip, (self.width, self.height))
-                    else:
-                        # ランダムモード：ランダムにアニメーションタイプを選択（前のシーンと異なるものを選択）
-                        available_animations = [
-                            anim for anim in ANIMATION_TYPES 
-                            if anim != previous_animation_type
-                        ]
-                        # 前のシーンと同じアニメーションしか残っていない場合は全種類から選択
-                        if not available_animations:
-                            available_animations = ANIMATION_TYPES
-                        
-                        animation_type = random.choice(available_animations)
-                        previous_animation_type = animation_type  # 次のシーンのために記録
-                        logger.info(f"シーン{scene_number}にアニメーション適用: {animation_type}")
-                        # アニメーション付きクリップを作成
-                        image_clip = self._apply_animation(
-                            image_clip,
-                            animation_type,
-                            actual_duration,
-                            animation_scale
-                        )
+                if animation_type:
+                    logger.info(f"シーン{scene_number}にアニメーション適用: {animation_type}")
+                    # アニメーション用に拡大済みの画像からクリップを作成（同じ画像は1度だけ拡大する）
+                    scaled_size = (int(self.width * animation_scale), int(self.height * animation_scale))
+                    image_clip = ImageClip(self._load_scaled_image(image_path, scaled_size))
+                    # アニメーション付きクリップを作成
+                    image_clip = self._apply_animation(
+                        image_clip,
+                        animation_type,
+                        actual_duration,
+                        animation_scale
+                    )
                 else:
                     # アニメーションなしの場合は通常のリサイズ
-                    image_clip = resize_fx(image_clip, (self.width, self.height))
-                    previous_animation_type = None  # アニメーションなしの場合はリセット
+                    image_clip = self._fit_to_video_size(ImageClip(str(image_path)))
                 
                 # 音声の長さに合わせて画像の長さを調整
                 image_clip = image_clip.set_duration(actual_duration)
@@ -249,34 +409,59 @@ class VideoEditor:
                 
                 # 字幕を追加
                 if add_subtitles and subtitle_text:
-                    subtitle_clip = self._create_subtitle_clip(
-                        subtitle_text,
-                        actual_duration,
-                        subtitle_style,
-                        subtitle_bottom_offset
-                    )
-                    # 字幕クリップが正常に作成された場合のみ合成
-                    if subtitle_clip is not None:
-                        _ensure_ismask(video_clip)
-                        _ensure_ismask(subtitle_clip)
-                        video_clip = CompositeVideoClip([video_clip, subtitle_clip])
+                    if video_clip.mask is None:
+                        # 不透明なクリップは字幕の範囲だけをフレームごとにアルファブレンドする
+                        # （CompositeVideoClip による汎用の合成処理を通さない）
+                        blend_subtitle = self._create_subtitle_blender(
+                            subtitle_text,
+                            subtitle_style,
+                            subtitle_bottom_offset
+                        )
+                        if blend_subtitle is not None:
+                            # ImageClip.fl_image は最初のフレームだけを変換して静止画にしてしまうため、
+                            # アニメーションを保つよう fl でフレームごとに適用する
+                            video_clip = video_clip.fl(lambda get_frame, t: blend_subtitle(get_frame(t)))
+                    else:
+                        subtitle_clip = self._create_subtitle_clip(
+                            subtitle_text,
+                            actual_duration,
+                            subtitle_style,
+                            subtitle_bottom_offset
+                        )
+                        # 字幕クリップが正常に作成された場合のみ合成
+                        if subtitle_clip is not None:
+                            _ensure_ismask(video_clip)
+                            _ensure_ismask(subtitle_clip)
+                            video_clip = CompositeVideoClip([video_clip, subtitle_clip])
                 
-                video_clips.append(video_clip)
-                animation_info = f", アニメーション: {animation_type}" if enable_animation and animation_type else ""
+                animation_info = f", アニメーション: {animation_type}" if animation_type else ""
                 logger.info(f"シーン{scene_number}の動画クリップを作成しました（長さ: {actual_duration:.2f}秒{animation_info}）")
-                update_progress(f"シーン{scene_number}/{len(scenes)}の処理が完了しました", 1)
+                return video_clip
             
             except Exception as e:
                 logger.error(f"シーン{scene_number}の動画クリップ作成に失敗しました: {e}")
                 raise
         
+        # シーンごとのクリップ作成（ファイルの読み込み・画像のデコード）を並列化
+        # map は入力順に結果を返すため、シーンの順序は保持される。進捗の更新はこのスレッドで行う
+        video_clips = []
+        if scene_tasks:
+            with ThreadPoolExecutor(max_workers=min(8, len(scene_tasks))) as executor:
+                for task, video_clip in zip(scene_tasks, executor.map(build_scene_clip, scene_tasks)):
+                    video_clips.append(video_clip)
+                    update_progress(f"シーン{task[0]}/{len(scenes)}の処理が完了しました", 1)
+        
         if not video_clips:
             raise ValueError("動画クリップが作成されませんでした")
         
         # すべてのクリップを結合
         logger.info(f"{len(video_clips)}個のクリップを結合します")
         update_progress("動画クリップを結合中...", 0)
-        final_video = concatenate_videoclips(video_clips, method="compose")
+        # 全シーンのクリップは動画サイズ（self.width x self.height）に揃っているため、
+        # マスクを持つクリップがなければ、フレームごとの合成が必要な compose ではなく順に繋ぐだけの chain で結合する
+        # （chain ではマスクのないクリップに1x1のマスクが付き、背景動画との合成で画像が消えるため、マスクがある場合は compose）
+        concat_method = "chain" if all(clip.mask is None for clip in video_clips) else "compose"
+        final_video = concatenate_videoclips(video_clips, method=concat_method)
         update_progress("動画クリップの結合が完了しました", 1)
         
         # 背景動画の合成
@@ -288,7 +473,7 @@ class VideoEditor:
                 bg_video_clip = VideoFileClip(str(bg_video_path))
                 
                 # 背景動画をリサイズ
-                bg_video_clip = resize_fx(bg_video_clip, (self.width, self.height))
+                bg_video_clip = self._fit_to_video_size(bg_video_clip)
                 
                 # 最終動画の長さを取得
                 total_duration = final_video.duration
@@ -299,10 +484,8 @@ class VideoEditor:
                     loop_count = int(total_duration / bg_video_clip.duration) + 1
                     logger.info(f"背景動画をループします（{loop_count}回）")
                     
-                    # ループさせた背景動画を作成
-                    bg_clips = [bg_video_clip] * loop_count
-                    bg_video_looped = concatenate_videoclips(bg_clips)
-                    bg_video_looped = bg_video_looped.subclip(0, total_duration)
+                    # ループさせた背景動画を作成（MoviePyの loop は時刻を折り返して同じ読み込み元を参照する）
+                    bg_video_looped = vfx_loop(bg_video_clip.without_audio(), duration=total_duration)
                 else:
                     # 背景動画が十分長い場合はそのまま使用
                     bg_video_looped = bg_video_clip.subclip(0, total_duration)
@@ -377,15 +560,57 @@ class VideoEditor:
         # 動画を書き出し
         try:
             update_progress("動画ファイルを書き出し中...（この処理には時間がかかります）", 0)
-            final_video.write_videofile(
-                str(output_path),
+            write_options = dict(
                 fps=self.fps,
                 bitrate=f"{self.bitrate // 1000000}M",
-                codec="libx264",
                 audio_codec="aac",
-                preset="medium",
                 logger=None  # MoviePyのログを無効化
             )
+            written = False
+            hw_encoder = _probe_ffmpeg_encoders() if use_gpu else None
+            if hw_encoder in _FAILED_HW_ENCODERS:
+                hw_encoder = None
+            if hw_encoder is not None:
+                if quality is not None:
+                    logger.info(f"{hw_encoder} で書き出すため画質指定（{quality}）は使用しません")
+                try:
+                    final_video.write_videofile(
+                        str(output_path),
+                        codec=hw_encoder,
+                        preset=_HW_WRITE_PRESET,
+                        ffmpeg_params=_ENCODER_FFMPEG_PARAMS[hw_encoder],
+                        **write_options
+                    )
+                    written = True
+                except Exception as e:
+                    # エンコーダが一覧にあってもGPUがない等で使えない場合がある
+                    # 動作確認を通っても失敗する環境では、以降の動画生成でも使わない
+                    _FAILED_HW_ENCODERS.add(hw_encoder)
+                    logger.warning(f"{hw_encoder} での書き出しに失敗したため libx264 で書き出します: {e}")
+            
+            if not written:
+                # CPUエンコード（libx264）で書き出す（スレッド数はffmpegに自動で決めさせる）
+                x264_options = dict(write_options, preset="medium", ffmpeg_params=["-threads", "0"])
+                if quality is not None:
+                    if quality in _QUALITY_PRESETS:
+                        # 画質指定時は固定ビットレートではなくCRFで品質を揃える
+                        preset, crf = _QUALITY_PRESETS[quality]
+                        ffmpeg_params = ["-crf", str(crf), "-threads", "0"]
+                        if not enable_animation and bg_video_clip is None:
+                            # 静止画だけの動画は stillimage チューニングを使う（動きのある映像では画質が落ちるため）
+                            ffmpeg_params += ["-tune", "stillimage"]
+                        x264_options.update(
+                            bitrate=None,
+                            preset=preset,
+                            ffmpeg_params=ffmpeg_params
+                        )
+                    else:
+                        logger.warning(f"不明な画質指定のため既定の設定で書き出します: {quality}")
+                final_video.write_videofile(
+                    str(output_path),
+                    codec="libx264",
+                    **x264_options
+                )
             
             update_progress("動画の生成が完了しました！", 1)
             logger.info(f"動画を生成しました: {output_path}")
@@ -403,6 +628,41 @@ class VideoEditor:
             if bg_video_clip is not None:
                 bg_video_clip.close()
     
+    def _load_scaled_image(self, image_path: Path, size: tuple) -> np.ndarray:
+        """
+        画像を指定サイズに拡大した配列を取得（同じ画像・サイズは1度だけ拡大してキャッシュする）
+        
+        Args:
+            image_path: 画像ファイルのパス
+            size: 拡大後のサイズ（幅, 高さ）
+        
+        Returns:
+            np.ndarray: 拡大した画像の配列（透過のある画像はRGBA、それ以外はRGB）
+        """
+        cache_key = (str(image_path), size)
+        img_array = self._scaled_image_cache.get(cache_key)
+        if img_array is None:
+            with Image.open(image_path) as img:
+                has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+                img = img.convert("RGBA" if has_alpha else "RGB")
+            img_array = np.asarray(img.resize(size, Image.LANCZOS))
+            self._scaled_image_cache[cache_key] = img_array
+        return img_array
+    
+    def _fit_to_video_size(self, clip):
+        """
+        クリップを動画サイズにリサイズ（既に同じサイズの場合はそのまま返す）
+        
+        Args:
+            clip: 画像・動画クリップ
+        
+        Returns:
+            動画サイズのクリップ
+        """
+        if tuple(clip.size) == (self.width, self.height):
+            return clip
+        return resize_fx(clip, (self.width, self.height))
+    
     def _apply_animation(
         self,
         clip: ImageClip,
@@ -426,8 +686,9 @@ class VideoEditor:
         scaled_width = int(self.width * scale)
         scaled_height = int(self.height * scale)
         
-        # 画像を拡大（アニメーション用の余白を確保）
-        clip = resize_fx(clip, (scaled_width, scaled_height))
+        # 画像を拡大（アニメーション用の余白を確保。拡大済みの場合はそのまま使う）
+        if tuple(clip.size) != (scaled_width, scaled_height):
+            clip = resize_fx(clip, (scaled_width, scaled_height))
         
         # 移動量の計算
         move_x = (scaled_width - self.width) // 2
@@ -437,6 +698,12 @@ class VideoEditor:
         output_width = self.width
         output_height = self.height
         
+        def crop_frame(frame, left, top):
+            """フレームを出力サイズで切り出す（配列のスライスのためPIL Imageへの変換やコピーが不要）"""
+            left = min(max(left, 0), frame.shape[1] - output_width)
+            top = min(max(top, 0), frame.shape[0] - output_height)
+            return frame[top:top + output_height, left:left + output_width]
+        
         if animation_type == "zoom_in":
             # ゆっくりズームアップ（中央から拡大）
             def zoom_effect(get_frame, t):
@@ -447,21 +714,16 @@ class VideoEditor:
                 # 現在のフレームを取得
                 frame = get_frame(t)
                 
-                # フレームをPIL Imageに変換
-                img = Image.fromarray(frame)
-                
                 # 現在のスケールに応じてクロップ
                 crop_w = int(output_width / current_scale * scale)
                 crop_h = int(output_height / current_scale * scale)
                 
-                # 中央からクロップ
+                # 中央からクロップ（配列のスライスで切り出し、切り出した範囲だけをPIL Imageに変換）
                 left = (scaled_width - crop_w) // 2
                 top = (scaled_height - crop_h) // 2
-                right = left + crop_w
-                bottom = top + crop_h
-                
-                img = img.crop((left, top, right, bottom))
-                img = img.resize((output_width, output_height), Image.LANCZOS)
+                img = Image.fromarray(frame[top:top + crop_h, left:left + crop_w])
+                # ゆっくりしたズームでは画質差が目立たないため、軽いバイリニア補間を使う
+                img = img.resize((output_width, output_height), Image.BILINEAR)
                 
                 return np.array(img)
             
@@ -474,16 +736,11 @@ class VideoEditor:
                 offset_x = int(move_x * (1 - 2 * progress))  # 右から左へ
                 
                 frame = get_frame(t)
-                img = Image.fromarray(frame)
                 
                 # オフセットに基づいてクロップ
                 left = move_x - offset_x
                 top = move_y
-                right = left + output_width
-                bottom = top + output_height
-                
-                img = img.crop((left, top, right, bottom))
-                return np.array(img)
+                return crop_frame(frame, left, top)
             
             return clip.fl(slide_left_effect, apply_to=['mask'])
         
@@ -494,16 +751,11 @@ class VideoEditor:
                 offset_x = int(-move_x + move_x * 2 * progress)  # 左から右へ
                 
                 frame = get_frame(t)
-                img = Image.fromarray(frame)
                 
                 # オフセットに基づいてクロップ
                 left = move_x - offset_x
                 top = move_y
-                right = left + output_width
-                bottom = top + output_height
-                
-                img = img.crop((left, top, right, bottom))
-                return np.array(img)
+                return crop_frame(frame, left, top)
             
             return clip.fl(slide_right_effect, apply_to=['mask'])
         
@@ -514,16 +766,11 @@ class VideoEditor:
                 offset_y = int(move_y * (1 - 2 * progress))  # 下から上へ
                 
                 frame = get_frame(t)
-                img = Image.fromarray(frame)
                 
                 # オフセットに基づいてクロップ
                 left = move_x
                 top = move_y - offset_y
-                right = left + output_width
-                bottom = top + output_height
-                
-                img = img.crop((left, top, right, bottom))
-                return np.array(img)
+                return crop_frame(frame, left, top)
             
             return clip.fl(slide_up_effect, apply_to=['mask'])
         
@@ -534,22 +781,17 @@ class VideoEditor:
                 offset_y = int(-move_y + move_y * 2 * progress)  # 上から下へ
                 
                 frame = get_frame(t)
-                img = Image.fromarray(frame)
                 
                 # オフセットに基づいてクロップ
                 left = move_x
                 top = move_y - offset_y
-                right = left + output_width
-                bottom = top + output_height
-                
-                img = img.crop((left, top, right, bottom))
-                return np.array(img)
+                return crop_frame(frame, left, top)
             
             return clip.fl(slide_down_effect, apply_to=['mask'])
         
         else:
             # デフォルト：アニメーションなし
-            return resize_fx(clip, (self.width, self.height))
+            return self._fit_to_video_size(clip)
     
     def _create_subtitle_clip(
         self,
@@ -571,125 +813,8 @@ class VideoEditor:
             ImageClip: 字幕クリップ
         """
         try:
-            fontsize = style.get("fontsize", 60)
-            text_color = style.get("color", "white")
-            stroke_color = style.get("stroke_color", "black")
-            stroke_width = style.get("stroke_width", 2)
-            # 折り返し幅：動画幅から余白と縁取り分を引く（はみ出し防止）
-            margin = 100  # 左右の余白（ピクセル）
-            stroke_margin = 2 * max(stroke_width, 1)
-            max_width = style.get("size", (self.width - 100, None))[0]
-            max_width = min(max_width, self.width - margin - stroke_margin)
-            
-            # フォントの読み込み（日本語対応フォントを優先）
-            font = None
-            font_paths = [
-                # macOSの日本語フォント（優先順位順）
-                "/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc",  # 太字
-                "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",  # 通常
-                "/System/Library/Fonts/Helvetica.ttc",
-                "/System/Library/Fonts/Arial.ttf",
-                "/Library/Fonts/Arial.ttf",
-            ]
-            
-            for font_path in font_paths:
-                try:
-                    if font_path.endswith('.ttc'):
-                        # TTCファイルの場合はフォントインデックスを指定
-                        font = ImageFont.truetype(font_path, fontsize, index=0)
-                    else:
-                        font = ImageFont.truetype(font_path, fontsize)
-                    logger.info(f"フォントを読み込みました: {font_path}")
-                    break
-                except Exception as e:
-                    logger.debug(f"フォント読み込み失敗: {font_path} - {e}")
-                    continue
-            
-            if font is None:
-                # デフォルトフォントを使用（日本語非対応の可能性あり）
-                try:
-                    font = ImageFont.load_default()
-                    logger.warning("デフォルトフォントを使用します（日本語が表示されない可能性があります）")
-                except:
-                    font = None
-            
-            # テキストのサイズを計算
-            if font:
-                # テキストを折り返す（日本語対応）
-                lines = []
-                current_line = ""
-                
-                # 日本語は文字単位、英語は単語単位で処理
-                for char in text:
-                    test_line = current_line + char
-                    bbox = font.getbbox(test_line)
-                    text_width = bbox[2] - bbox[0]
-                    
-                    if text_width <= max_width:
-                        current_line = test_line
-                    else:
-                        if current_line:
-                            lines.append(current_line)
-                        # 現在の文字が1文字でも幅を超える場合は強制的に追加
-                        if current_line == "":
-                            current_line = char
-                        else:
-                            current_line = char
-                
-                if current_line:
-                    lines.append(current_line)
-            else:
-                lines = [text]
-            
-            # 画像のサイズを計算（動画幅に合わせる：ショート1080 / 長尺1920）
-            line_height = int(fontsize * 1.2)
-            padding = 20
-            img_height = len(lines) * line_height + padding * 2
-            img_width = self.width
-            
-            # 透明な画像を作成
-            img = Image.new("RGBA", (img_width, img_height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-            
-            # テキストを描画
-            y_offset = padding
-            for line in lines:
-                if not line:
-                    continue
-                
-                # テキストの位置を計算（中央揃え）
-                if font:
-                    bbox = font.getbbox(line)
-                    text_width = bbox[2] - bbox[0]
-                else:
-                    text_width = len(line) * fontsize // 2
-                
-                x = (img_width - text_width) // 2
-                
-                # 縁取りを描画
-                if stroke_width > 0:
-                    for adj in range(-stroke_width, stroke_width + 1):
-                        for adj2 in range(-stroke_width, stroke_width + 1):
-                            if adj != 0 or adj2 != 0:
-                                draw.text(
-                                    (x + adj, y_offset + adj2),
-                                    line,
-                                    font=font,
-                                    fill=stroke_color
-                                )
-                
-                # テキストを描画
-                draw.text(
-                    (x, y_offset),
-                    line,
-                    font=font,
-                    fill=text_color
-                )
-                
-                y_offset += line_height
-            
-            # PIL Imageをnumpy配列に変換
-            img_array = np.array(img)
+            img_array = self._get_subtitle_image(text, style)
+            img_height = img_array.shape[0]
             
             # ImageClipを作成
             subtitle_clip = ImageClip(img_array)
@@ -704,6 +829,216 @@ class VideoEditor:
         
         except Exception as e:
             logger.error(f"字幕クリップの作成に失敗しました（テキスト: {text}）: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             return None
+    
+    def _create_subtitle_blender(
+        self,
+        text: str,
+        style: dict,
+        bottom_offset: int = 50
+    ) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+        """
+        フレームに字幕をアルファブレンドする関数を作成
+        
+        字幕画像はあらかじめアルファ乗算済みにしておき、フレームごとには字幕の範囲だけを計算する。
+        
+        Args:
+            text: 字幕テキスト
+            style: 字幕のスタイル設定
+            bottom_offset: 下からのオフセット（ピクセル）
+        
+        Returns:
+            Optional[Callable]: フレームを受け取り字幕入りのフレームを返す関数（作成失敗時はNone）
+        """
+        try:
+            img_array = self._get_subtitle_image(text, style)
+            img_height, img_width = img_array.shape[:2]
+            
+            # 字幕クリップと同じ位置（水平中央・下からのオフセット）をフレーム内に収まる範囲で計算
+            x = (self.width - img_width) // 2
+            y = self.height - img_height - bottom_offset
+            top, left = max(y, 0), max(x, 0)
+            bottom = min(y + img_height, self.height)
+            right = min(x + img_width, self.width)
+            if bottom <= top or right <= left:
+                return None
+            subtitle = img_array[top - y:bottom - y, left - x:right - x]
+            
+            # アルファ乗算済みの字幕色と、背景側に掛ける係数（255 - アルファ）を事前計算
+            alpha = subtitle[..., 3:4].astype(np.uint16)
+            rgb_premult = (subtitle[..., :3].astype(np.uint16) * alpha + 127) // 255
+            inv_alpha = 255 - alpha
+            
+            def blend_subtitle(frame: np.ndarray) -> np.ndarray:
+                # 元のフレーム（静止画クリップでは毎回同じ配列）を書き換えないよう、
+                # 使い回しの出力バッファへコピーしてから合成する
+                # （書き出しはフレームを1枚ずつ処理するため、返したバッファは次のフレームまでに読み終わる）
+                out = self._frame_buffers.get(frame.shape)
+                if out is None:
+                    out = self._frame_buffers.setdefault(frame.shape, np.empty(frame.shape, np.uint8))
+                np.copyto(out, frame, casting="unsafe")
+                region = out[top:bottom, left:right]
+                region[...] = rgb_premult + (region * inv_alpha + 127) // 255
+                return out
+            
+            logger.info(f"字幕クリップを作成しました（テキスト: {text[:30]}...）")
+            return blend_subtitle
+        
+        except Exception as e:
+            logger.error(f"字幕クリップの作成に失敗しました（テキスト: {text}）: {e}")
+            logger.error(traceback.format_exc())
+            return None
+    
+    def _get_subtitle_image(self, text: str, style: dict) -> np.ndarray:
+        """
+        字幕画像（RGBA配列）を取得（同じテキスト・スタイルの字幕は描画済みの画像を再利用）
+        
+        Args:
+            text: 字幕テキスト
+            style: 字幕のスタイル設定
+        
+        Returns:
+            np.ndarray: 字幕画像の配列
+        """
+        fontsize = style.get("fontsize", 60)
+        text_color = style.get("color", "white")
+        stroke_color = style.get("stroke_color", "black")
+        stroke_width = style.get("stroke_width", 2)
+        # 折り返し幅：動画幅から余白と縁取り分を引く（はみ出し防止）
+        margin = 100  # 左右の余白（ピクセル）
+        stroke_margin = 2 * max(stroke_width, 1)
+        max_width = style.get("size", (self.width - 100, None))[0]
+        max_width = min(max_width, self.width - margin - stroke_margin)
+        
+        cache_key = (text, fontsize, text_color, stroke_color, stroke_width, max_width, self.width)
+        with self._subtitle_lock:
+            img_array = self._subtitle_cache.get(cache_key)
+            if img_array is None:
+                img_array = self._render_subtitle_image(
+                    text, fontsize, text_color, stroke_color, stroke_width, max_width
+                )
+                self._subtitle_cache[cache_key] = img_array
+        return img_array
+    
+    def _compose_subtitled_frame(
+        self,
+        image_path: Path,
+        text: str,
+        style: dict,
+        bottom_offset: int = 50
+    ) -> Optional[np.ndarray]:
+        """
+        画像を動画サイズにリサイズし、字幕を焼き込んだ静止画を作成
+        
+        Args:
+            image_path: 画像ファイルのパス
+            text: 字幕テキスト
+            style: 字幕のスタイル設定
+            bottom_offset: 下からのオフセット（ピクセル）
+        
+        Returns:
+            Optional[np.ndarray]: 字幕入りのRGB画像の配列
+                （透過画像や作成失敗時はNone。呼び出し元は通常の合成処理を使う）
+        """
+        try:
+            with Image.open(image_path) as img:
+                # 透過のある画像は背景動画と重ねるためマスクが必要なので焼き込まない
+                if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+                    return None
+                frame = img.convert("RGB")
+            if frame.size != (self.width, self.height):
+                frame = frame.resize((self.width, self.height), Image.LANCZOS)
+            
+            subtitle = Image.fromarray(self._get_subtitle_image(text, style))
+            # 字幕クリップと同じ位置（水平中央・下からのオフセット）に合成
+            x = (self.width - subtitle.width) // 2
+            y = self.height - subtitle.height - bottom_offset
+            frame.paste(subtitle, (x, y), subtitle)
+            return np.asarray(frame)
+        
+        except Exception as e:
+            logger.debug(f"字幕の焼き込みに失敗したため合成処理を使用します（{image_path}）: {e}")
+            return None
+    
+    def _render_subtitle_image(
+        self,
+        text: str,
+        fontsize: int,
+        text_color: str,
+        stroke_color: str,
+        stroke_width: int,
+        max_width: int
+    ) -> np.ndarray:
+        """
+        字幕テキストを透明背景のRGBA画像として描画
+        
+        Args:
+            text: 字幕テキスト
+            fontsize: フォントサイズ
+            text_color: 文字色
+            stroke_color: 縁取りの色
+            stroke_width: 縁取りの幅
+            max_width: 折り返し幅（ピクセル）
+        
+        Returns:
+            np.ndarray: 字幕画像の配列
+        """
+        font = _load_font(fontsize)
+        
+        # テキストを折り返し、各行の幅（ピクセル）も合わせて求める
+        if font:
+            # テキストを折り返す（日本語対応）
+            # 文字ごとの幅を1度だけ測り、行の幅は累積で求める（そのまま中央揃えにも使う）
+            char_widths = {char: font.getlength(char) for char in set(text)}
+            lines = []
+            current_line = []
+            running_width = 0.0
+            
+            # 日本語は文字単位で処理
+            for char in text:
+                char_width = char_widths[char]
+                # 現在の文字が1文字でも幅を超える場合は強制的に追加
+                if running_width + char_width <= max_width or not current_line:
+                    current_line.append(char)
+                    running_width += char_width
+                else:
+                    lines.append(("".join(current_line), round(running_width)))
+                    current_line = [char]
+                    running_width = char_width
+            
+            if current_line:
+                lines.append(("".join(current_line), round(running_width)))
+        else:
+            lines = [(text, len(text) * fontsize // 2)]
+        
+        # 画像のサイズを計算（幅は最も長い行に合わせる。配置時に動画の中央へ揃える）
+        line_height = int(fontsize * 1.2)
+        padding = 20
+        img_height = len(lines) * line_height + padding * 2
+        img_width = min(max((width for _, width in lines), default=0) + (padding + stroke_width) * 2, self.width)
+        
+        # 透明な画像を作成
+        img = Image.new("RGBA", (img_width, img_height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        
+        # テキストを描画
+        y_offset = padding
+        for line, text_width in lines:
+            # テキストの位置を計算（中央揃え）
+            x = (img_width - text_width) // 2
+            
+            # テキストを縁取り付きで描画（Pillowの stroke_width で1回の描画にまとめる）
+            draw.text(
+                (x, y_offset),
+                line,
+                font=font,
+                fill=text_color,
+                stroke_width=stroke_width,
+                stroke_fill=stroke_color
+            )
+            
+            y_offset += line_height
+        
+        # PIL Imageをnumpy配列に変換（読み取り専用で使うためコピー不要）
+        return np.asarray(img)